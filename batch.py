@@ -0,0 +1,264 @@
+"""Convert and analyse many MusicBlocks projects without the Streamlit UI.
+
+Input is either a directory of exported project .json files or a .jsonl file with one
+project per line (a block list, or {"id": ..., "project": [...]}). Projects without an
+"id" are identified by a hash of their content; repeated IDs are reported as errors.
+Results are appended to the output JSONL as they finish, so an interrupted run resumes
+where it stopped.
+While a run is in progress a retried project can appear more than once; the last
+record for an ID wins, and a completed run rewrites the file with one record per ID.
+
+Usage:
+    python batch.py projects/ -o results.jsonl
+    python batch.py projects.jsonl -o results.jsonl --concurrency 8
+    python batch.py projects/ -o results.jsonl --no-llm     # parse stages only
+"""
+import os
+import json
+import hashlib
+import time
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from utils.blocks import findBlockInfo
+from utils.parser import convert_music_blocks
+from utils.prompts import algorithm_prompt
+
+
+def content_id(text: str) -> str:
+    """Stable ID for a JSONL line without an explicit "id", unaffected by lines added or removed around it."""
+    return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def iter_projects(source: str) -> Iterator[Tuple[str, Optional[Union[List, Dict]], Optional[str]]]:
+    """
+    Yield (project_id, project_data, error) triples from a directory or a JSONL file.
+    A project that cannot be read or decoded is yielded with data None and the error
+    message, so one bad export does not stop the rest of the batch.
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(".json"):
+                try:
+                    with open(os.path.join(source, name), encoding="utf-8") as f:
+                        yield name, json.load(f), None
+                except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+                    yield name, None, str(e)
+        return
+
+    seen = {}
+    with open(source, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield content_id(line), None, str(e)
+                continue
+            if isinstance(entry, dict) and "project" in entry and "id" in entry:
+                project_id, data = str(entry["id"]), entry["project"]
+            else:
+                data = entry["project"] if isinstance(entry, dict) and "project" in entry else entry
+                project_id = content_id(json.dumps(data, sort_keys=True, separators=(",", ":")))
+
+            if project_id in seen:
+                # Give the duplicate its own ID so its error record cannot replace the
+                # result of the first project with this ID when the output is compacted.
+                yield (f"{project_id}@line{line_number}", None,
+                       f"duplicate project id {project_id!r} (first seen on line {seen[project_id]})")
+                continue
+            seen[project_id] = line_number
+            yield project_id, data, None
+
+
+def read_results(output_path: str) -> Dict[str, Dict]:
+    """Read an output file, keeping only the last record written for each project ID."""
+    records = {}
+    if not os.path.exists(output_path):
+        return records
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line.
+                continue
+            records.pop(record["id"], None)
+            records[record["id"]] = record
+    return records
+
+
+def compact_results(output_path: str) -> None:
+    """Rewrite the output file with one record per project ID, dropping superseded attempts."""
+    records = read_results(output_path)
+    temp_path = output_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for record in records.values():
+            f.write(json.dumps(record) + "\n")
+    os.replace(temp_path, output_path)
+
+
+def load_checkpoint(output_path: str, stages: List[str], include_failed: bool = False) -> Set[str]:
+    """
+    Return the IDs a previous run already completed for every stage in stages, so a
+    parse-only run does not stop a later full run from generating algorithms.
+    """
+    done = set()
+    for project_id, record in read_results(output_path).items():
+        if record.get("status") == "ok":
+            if set(stages) <= set(record.get("stages", [])):
+                done.add(project_id)
+        elif include_failed:
+            done.add(project_id)
+    return done
+
+
+def parse_project(project_id: str, data: Union[List, Dict]) -> Dict:
+    """Run the CPU-bound parse stages; executed in a worker process."""
+    started = time.perf_counter()
+    try:
+        flowchart = convert_music_blocks(data)
+        # convert_music_blocks reports unusable input as a one-line message rather than
+        # raising; only a real conversion starts with the project header.
+        if not flowchart or flowchart[0] != "Start of Project":
+            raise ValueError(flowchart[0] if flowchart else "Empty conversion result")
+        block_info = findBlockInfo(flowchart)
+    except Exception as e:
+        return {"id": project_id, "status": "error", "stage": "parse", "error": str(e), "stages": [],
+                "timing": {"parse": time.perf_counter() - started}}
+    return {
+        "id": project_id,
+        "status": "ok",
+        "stages": ["parse"],
+        "flowchart": flowchart,
+        "block_info": block_info,
+        "timing": {"parse": time.perf_counter() - started},
+    }
+
+
+def generate_project_algorithm(record: Dict, reasoning_llm) -> Dict:
+    """Run the LLM stage for an already parsed project; executed in a worker thread."""
+    started = time.perf_counter()
+    try:
+        algorithm = reasoning_llm.invoke(algorithm_prompt(record["flowchart"], record["block_info"]))
+        record["algorithm"] = algorithm.content
+        record["stages"].append("llm")
+    except Exception as e:
+        record.update(status="error", stage="llm", error=str(e))
+    record["timing"]["llm"] = time.perf_counter() - started
+    return record
+
+
+class ResultWriter:
+    """Append JSONL records from several threads, flushing each one so progress survives a crash."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.counts = {"ok": 0, "error": 0}
+
+    def write(self, record: Dict) -> None:
+        record["timing"]["total"] = sum(record["timing"].values())
+        with self.lock:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+            self.counts[record["status"]] += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def run_batch(
+        source: str,
+        output_path: str,
+        workers: int = os.cpu_count() or 1,
+        concurrency: int = 4,
+        use_llm: bool = True,
+        retry_failed: bool = True
+) -> Dict[str, int]:
+    """Parse projects across a process pool and feed them to the LLM with bounded concurrency."""
+    stages = ["parse", "llm"] if use_llm else ["parse"]
+    done = load_checkpoint(output_path, stages, include_failed=not retry_failed)
+    writer = ResultWriter(output_path)
+    skipped = 0
+
+    reasoning_llm = None
+    if use_llm:
+        # Imported here so parse-only runs work without a Google API key.
+        from utils.llm import reasoning_llm
+
+    def generate_and_write(record: Dict) -> None:
+        writer.write(generate_project_algorithm(record, reasoning_llm))
+
+    parse_pool = ProcessPoolExecutor(max_workers=workers)
+    llm_pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        parse_futures = []
+        for project_id, data, error in iter_projects(source):
+            if project_id in done:
+                skipped += 1
+                continue
+            if error is not None:
+                writer.write({"id": project_id, "status": "error", "stage": "load", "error": error,
+                              "stages": [], "timing": {}})
+                continue
+            parse_futures.append(parse_pool.submit(parse_project, project_id, data))
+
+        llm_futures = []
+        for future in as_completed(parse_futures):
+            record = future.result()
+            if use_llm and record["status"] == "ok":
+                llm_futures.append(llm_pool.submit(generate_and_write, record))
+            else:
+                writer.write(record)
+
+        for future in llm_futures:
+            future.result()
+    except KeyboardInterrupt:
+        # Drop queued work so Ctrl-C stops promptly; LLM calls already in flight
+        # still finish and are written, the rest is picked up on the next run.
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+        llm_pool.shutdown(cancel_futures=True)
+        raise
+    finally:
+        parse_pool.shutdown()
+        llm_pool.shutdown()
+        writer.close()
+
+    compact_results(output_path)
+    return {**writer.counts, "skipped": skipped}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Convert and analyse MusicBlocks projects in bulk.")
+    arg_parser.add_argument("source", help="Directory of project .json files, or a .jsonl file")
+    arg_parser.add_argument("-o", "--output", default="results.jsonl", help="Output JSONL (also the checkpoint)")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Processes used for the parse stages")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="Maximum LLM requests in flight")
+    arg_parser.add_argument("--no-llm", action="store_true", help="Skip algorithm generation")
+    arg_parser.add_argument("--no-retry", action="store_true",
+                            help="Do not retry projects that failed in a previous run")
+    args = arg_parser.parse_args()
+
+    if args.workers < 1:
+        arg_parser.error("--workers must be at least 1")
+    if args.concurrency < 1:
+        arg_parser.error("--concurrency must be at least 1")
+
+    started = time.perf_counter()
+    try:
+        counts = run_batch(args.source, args.output, args.workers, args.concurrency,
+                           use_llm=not args.no_llm, retry_failed=not args.no_retry)
+    except KeyboardInterrupt:
+        raise SystemExit(f"Interrupted; re-run the same command to resume from {args.output}")
+    print(f"{counts['ok']} ok, {counts['error']} failed, {counts['skipped']} already done "
+          f"({time.perf_counter() - started:.1f}s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
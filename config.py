@@ -6,5 +6,9 @@ load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_PATH = os.getenv("QDRANT_PATH")
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
-CHROMA_DB_DIR = "./db"
\ No newline at end of file
+CHROMA_DB_DIR = "./db"
+COLLECTION_NAME = "mb_docs"
+DOCS_DIR = "./docs"
+HISTORY_DIR = "./history"
@@ -0,0 +1,247 @@
+"""Build and incrementally refresh the Qdrant collection queried by retriever.py.
+
+Each chunk is identified by a hash of its source path and content, so a re-run
+only embeds chunks that are new or changed and deletes chunks that disappeared.
+
+Usage:
+    python ingest.py --docs ./docs
+    python ingest.py --docs ./docs --local ./db    # embedded Qdrant, no server (set QDRANT_PATH=./db for the app)
+"""
+import os
+import time
+import uuid
+import hashlib
+import argparse
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Set
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from qdrant_client import QdrantClient, models
+from sentence_transformers import SentenceTransformer
+import config
+
+
+DOC_EXTENSIONS = (".md", ".txt", ".html")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+EMBED_BATCH_SIZE = 256
+UPSERT_BATCH_SIZE = 512
+SCROLL_PAGE_SIZE = 1000
+
+
+BLOCK_TAGS = {"p", "div", "section", "article", "li", "ul", "ol", "tr", "table", "br", "pre",
+              "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class _TextExtractor(HTMLParser):
+    """Collect the visible text of an HTML page, skipping scripts and styles."""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(markup: str) -> str:
+    extractor = _TextExtractor()
+    extractor.feed(markup)
+    extractor.close()
+    lines = (" ".join(line.split()) for line in "".join(extractor.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def load_documents(docs_dir: str) -> Dict[str, str]:
+    """Read every supported file under docs_dir as plain text, keyed by its relative path."""
+    documents = {}
+    for root, _, files in os.walk(docs_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(DOC_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+            except UnicodeDecodeError:
+                print(f"Warning: skipping {path}, not valid UTF-8")
+                continue
+            if name.lower().endswith(".html"):
+                text = html_to_text(text)
+            documents[os.path.relpath(path, docs_dir).replace(os.sep, "/")] = text
+    return documents
+
+
+def chunk_documents(documents: Dict[str, str], model_name: str = config.EMBEDDING_MODEL) -> Dict[str, Dict]:
+    """
+    Split documents into chunks keyed by a deterministic, content-derived point ID.
+    The embedding model is part of the hash, so switching models re-embeds every chunk
+    instead of keeping vectors from the old model alongside new ones.
+    """
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = {}
+    for source, text in documents.items():
+        for piece in splitter.split_text(text):
+            content_hash = hashlib.sha256(f"{model_name}\0{source}\0{piece}".encode("utf-8")).hexdigest()
+            point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, content_hash))
+            chunks[point_id] = {"text": piece, "source": source, "content_hash": content_hash,
+                                "embedding_model": model_name}
+    return chunks
+
+
+def get_client(local_path: Optional[str] = None) -> QdrantClient:
+    """Connect to Qdrant Cloud, or to an embedded on-disk instance when local_path is given."""
+    if local_path:
+        return QdrantClient(path=local_path)
+    return QdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY)
+
+
+def ensure_collection(client: QdrantClient, collection_name: str, dimension: int) -> None:
+    """Create the collection if it does not exist yet, and check its vector size if it does."""
+    if not client.collection_exists(collection_name):
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=dimension, distance=models.Distance.COSINE),
+        )
+        return
+    size = client.get_collection(collection_name).config.params.vectors.size
+    if size != dimension:
+        raise ValueError(f"Collection {collection_name!r} stores {size}-dimensional vectors but the "
+                         f"embedding model produces {dimension}; index into a new collection instead")
+
+
+def existing_ids(client: QdrantClient, collection_name: str) -> Set[str]:
+    """Return the IDs of all points currently stored, without fetching vectors or payloads."""
+    ids = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=SCROLL_PAGE_SIZE,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        ids.update(str(point.id) for point in points)
+        if offset is None:
+            return ids
+
+
+def embed_texts(model: SentenceTransformer, texts: List[str], batch_size: int, workers: int):
+    """Encode texts in large batches, spreading the work over several CPU processes if asked."""
+    if workers > 1 and len(texts) > batch_size:
+        pool = model.start_multi_process_pool(["cpu"] * workers)
+        try:
+            return model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            model.stop_multi_process_pool(pool)
+    return model.encode(texts, batch_size=batch_size, normalize_embeddings=False, show_progress_bar=False)
+
+
+def batched(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def sync_collection(
+        client: QdrantClient,
+        model: SentenceTransformer,
+        chunks: Dict[str, Dict],
+        collection_name: str = config.COLLECTION_NAME,
+        batch_size: int = EMBED_BATCH_SIZE,
+        workers: int = 1,
+        prune_all: bool = False
+) -> Dict[str, int]:
+    """
+    Embed and upsert chunks missing from the collection, and delete points no longer present.
+    An empty chunk set would delete every stored point, so it is refused unless prune_all is set.
+    """
+    if not chunks and not prune_all:
+        raise ValueError("No chunks to index; refusing to delete the whole collection without prune_all")
+
+    ensure_collection(client, collection_name, model.get_sentence_embedding_dimension())
+
+    stored = existing_ids(client, collection_name)
+    new_ids = [point_id for point_id in chunks if point_id not in stored]
+    stale_ids = [point_id for point_id in stored if point_id not in chunks]
+
+    if new_ids:
+        vectors = embed_texts(model, [chunks[point_id]["text"] for point_id in new_ids], batch_size, workers)
+        points = [
+            models.PointStruct(
+                id=point_id,
+                vector=vector.tolist(),
+                payload={
+                    # Payload layout expected by langchain_qdrant.QdrantVectorStore
+                    "page_content": chunks[point_id]["text"],
+                    "metadata": {
+                        "source": chunks[point_id]["source"],
+                        "content_hash": chunks[point_id]["content_hash"],
+                        "embedding_model": chunks[point_id]["embedding_model"],
+                    },
+                },
+            )
+            for point_id, vector in zip(new_ids, vectors)
+        ]
+        for batch in batched(points, UPSERT_BATCH_SIZE):
+            client.upsert(collection_name=collection_name, points=batch, wait=True)
+
+    for batch in batched(stale_ids, UPSERT_BATCH_SIZE):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=batch),
+            wait=True,
+        )
+
+    return {
+        "added": len(new_ids),
+        "removed": len(stale_ids),
+        "unchanged": len(chunks) - len(new_ids),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Index the MusicBlocks docs into Qdrant.")
+    arg_parser.add_argument("--docs", default=config.DOCS_DIR, help="Directory containing the docs")
+    arg_parser.add_argument("--collection", default=config.COLLECTION_NAME)
+    arg_parser.add_argument("--local", metavar="PATH", default=config.QDRANT_PATH,
+                            help="Use an embedded Qdrant store at PATH instead of QDRANT_URL (default: QDRANT_PATH)")
+    arg_parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="CPU processes used for encoding; each loads its own copy of the model")
+    arg_parser.add_argument("--prune-all", action="store_true",
+                            help="Allow an empty docs directory to delete every point in the collection")
+    args = arg_parser.parse_args()
+
+    if not os.path.isdir(args.docs):
+        arg_parser.error(f"docs directory not found: {args.docs}")
+
+    started = time.perf_counter()
+    documents = load_documents(args.docs)
+    if not documents and not args.prune_all:
+        arg_parser.error(f"no {', '.join(DOC_EXTENSIONS)} files found in {args.docs} (use --prune-all to empty the collection)")
+    chunks = chunk_documents(documents)
+    model = SentenceTransformer(config.EMBEDDING_MODEL, device='cpu', cache_folder='./model_cache')
+    client = get_client(args.local)
+
+    stats = sync_collection(client, model, chunks, args.collection, args.batch_size, args.workers, args.prune_all)
+    print(f"{args.collection}: {stats['added']} added, {stats['removed']} removed, "
+          f"{stats['unchanged']} unchanged ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,14 +11,17 @@ embeddings = HuggingFaceEmbeddings(
     encode_kwargs={'normalize_embeddings': False}
 )
 
-qdrant_client = QdrantClient(
-    url=config.QDRANT_URL,
-    api_key=config.QDRANT_API_KEY,
-)
+if config.QDRANT_PATH:
+    qdrant_client = QdrantClient(path=config.QDRANT_PATH)
+else:
+    qdrant_client = QdrantClient(
+        url=config.QDRANT_URL,
+        api_key=config.QDRANT_API_KEY,
+    )
 
 vectorstore = QdrantVectorStore(
     client=qdrant_client,
-    collection_name="mb_docs",
+    collection_name=config.COLLECTION_NAME,
     embedding=embeddings
 )
 
@@ -1,14 +1,15 @@
 import streamlit as st
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from sentence_transformers import SentenceTransformer
 from retriever import getContext
 import config
 import json
 from utils.session_state import initialize_session_state
-from utils.prompts import instructions, generate_algorithm
+from utils.prompts import instructions, algorithm_prompt, generate_summary
+from utils.llm import llm, reasoning_llm
 from utils.blocks import findBlockInfo
 from utils.parser import convert_music_blocks
+from utils.history import load_history, save_history, add_summary, build_digest
 
 model = SentenceTransformer(
     config.EMBEDDING_MODEL,
@@ -16,20 +17,6 @@ model = SentenceTransformer(
     cache_folder='./model_cache'
 )
 
-llm = ChatGoogleGenerativeAI(
-    model="models/gemini-2.0-flash",
-    google_api_key=config.GOOGLE_API_KEY,
-    temperature=0.7,
-    disable_streaming=False
-)
-
-reasoning_llm = ChatGoogleGenerativeAI(
-    model="models/gemini-2.5-flash",
-    google_api_key=config.GOOGLE_API_KEY,
-    temperature=0.7,
-    disable_streaming=False
-)
-
 # Initialize session state
 initialize_session_state()
 
@@ -43,7 +30,7 @@ def combined_input(rag, messages):
         final_prompt = f"Conversation History:\n{conversation_history}" + f"\n\nContext: {rag}\n\n{selected_mentor} assistant:"
     return final_prompt
 
-def analysis(old_summary, new_summary):
+def analysis(history_digest, new_summary):
     analysis_prompt = f"""
     You are an expert reflective coach analyzing a learner's journey. Your task is to deeply analyze these summaries to identify the following:
 
@@ -56,14 +43,22 @@ def analysis(old_summary, new_summary):
     Present the analysis in clear sections with thoughtful insights.
     Avoid simply repeating what the summaries say — provide higher-level interpretation and reasoning.
 
-    Previous Summary:
-    {old_summary}
+    Learning History (precomputed from all recorded sessions, including the current one):
+    {history_digest}
     Current Summary:
     {new_summary}
     Learning Outcome:
     """
     return reasoning_llm.invoke(analysis_prompt)
 
+def summarize(messages):
+    conversation_history = ""
+    for msg in messages:
+        if not isinstance(msg, SystemMessage):
+            role = "User" if isinstance(msg, HumanMessage) else "Mentor"
+            conversation_history += f"{role}: {msg.content}\n"
+    return llm.invoke(f"instructions:\n{generate_summary}\n\nConversation:\n{conversation_history}")
+
 def stream_response(prompt, model):
     full_response = ""  
     container = st.empty()        
@@ -93,12 +88,32 @@ with st.sidebar:
         # st.rerun()
         
 
+    st.session_state.learner_id = st.text_input("Learner name", value=st.session_state.learner_id)
+
+    if st.button("Generate Summary"):
+        if not any(isinstance(msg, HumanMessage) for msg in st.session_state.messages):
+            st.warning("⚠️ Please chat with your mentor first.")
+        else:
+            try:
+                summary = summarize(st.session_state.messages)
+                st.session_state.summary = summary.content
+                st.session_state.messages.append(
+                    AIMessage(content=f"📝 Summary:\n\n{summary.content}")
+                )
+            except Exception as e:
+                st.error(f"Error generating summary: {str(e)}")
+
     if st.button("Generate Analysis"):
         if not st.session_state.summary:
             st.warning("⚠️ Please generate a summary first.")
+        elif not st.session_state.learner_id.strip():
+            st.warning("⚠️ Please enter the learner's name first.")
         else:
             try:
-                outcome = analysis(st.session_state.old_summary, st.session_state.summary)
+                history = load_history(st.session_state.learner_id)
+                if add_summary(history, st.session_state.summary, model, st.session_state.session_id):
+                    save_history(history)
+                outcome = analysis(build_digest(history), st.session_state.summary)
                 st.session_state.outcome = outcome.content
                 st.session_state.messages.append(
                     AIMessage(content=f"📈 Learning Outcome:\n\n{outcome.content}")
@@ -141,7 +156,7 @@ if 'data' not in st.session_state or not st.session_state.data :
         flowchart = convert_music_blocks(data)
         blockInfo = findBlockInfo(flowchart)
         
-        algorithm = reasoning_llm.invoke(f"instructions:\n{generate_algorithm}\n\ncode:\n{flowchart}\n\nBlock Info:\n{blockInfo}")
+        algorithm = reasoning_llm.invoke(algorithm_prompt(flowchart, blockInfo))
         st.session_state.code_algorithm = algorithm.content   
         st.session_state.messages[0] = SystemMessage(content=instructions[selected_mentor] + "\n\n--- Algorithm ---\n" + algorithm.content)
         
@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import time
+import hashlib
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import config
+
+
+GAP_CUES = ("struggl", "difficult", "challeng", "confus", "trouble", "stuck", "not sure",
+            "didn't", "did not", "couldn't", "could not", "wasn't able", "unable", "hard to", "need to practice")
+MAX_THEMES = 3
+MAX_GAPS = 3
+GAP_SIMILARITY = 0.6
+EXCERPT_LENGTH = 160
+KMEANS_ITERATIONS = 10
+TREND_TOLERANCE = 0.05
+
+
+def _normalize_learner_id(learner_id: str) -> str:
+    return unicodedata.normalize("NFKC", learner_id.strip()).casefold()
+
+
+def _history_paths(learner_id: str, history_dir: str) -> Tuple[str, str]:
+    # The readable slug alone is lossy (non-ASCII names collapse to "_"), so the
+    # filename also carries a hash of the full normalised ID.
+    normalized = _normalize_learner_id(learner_id)
+    slug = re.sub(r"[^a-z0-9_-]+", "_", normalized).strip("_")[:40] or "learner"
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:12]
+    base = os.path.join(history_dir, f"{slug}-{digest}")
+    return base + ".json", base + ".npz"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _excerpt(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= EXCERPT_LENGTH else text[:EXCERPT_LENGTH].rsplit(" ", 1)[0] + "..."
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+
+def find_gap_sentences(summary: str) -> List[str]:
+    """Pick out sentences that mention a difficulty or something left to work on."""
+    return [s for s in split_sentences(summary) if any(cue in s.lower() for cue in GAP_CUES)]
+
+
+def load_history(learner_id: str, history_dir: str = config.HISTORY_DIR) -> Dict:
+    """Load a learner's stored summaries and their embeddings, or an empty history."""
+    json_path, npz_path = _history_paths(learner_id, history_dir)
+    history = {
+        "learner_id": learner_id,
+        "entries": [],
+        "embeddings": None,
+        "gap_embeddings": None,
+        "gap_sessions": np.zeros(0, dtype=int),
+    }
+    if os.path.exists(json_path) and os.path.exists(npz_path):
+        with open(json_path, encoding="utf-8") as f:
+            stored = json.load(f)
+        if _normalize_learner_id(stored["learner_id"]) != _normalize_learner_id(learner_id):
+            raise ValueError(f"History file {json_path} belongs to another learner")
+        history["entries"] = stored["entries"]
+        arrays = np.load(npz_path)
+        history["embeddings"] = arrays["embeddings"]
+        history["gap_embeddings"] = arrays["gap_embeddings"] if arrays["gap_embeddings"].size else None
+        history["gap_sessions"] = arrays["gap_sessions"]
+
+        # The two files are replaced one after the other, so a crash or a concurrent
+        # save can leave them out of step; refuse to pair vectors with the wrong text.
+        gap_count = sum(len(entry["gaps"]) for entry in history["entries"])
+        gap_rows = 0 if history["gap_embeddings"] is None else len(history["gap_embeddings"])
+        if (list(arrays["hashes"]) != [entry["hash"] for entry in history["entries"]]
+                or len(history["embeddings"]) != len(history["entries"])
+                or gap_rows != gap_count or len(history["gap_sessions"]) != gap_count):
+            raise ValueError(f"History files for {learner_id!r} in {history_dir} are out of sync")
+    return history
+
+
+def save_history(history: Dict, history_dir: str = config.HISTORY_DIR) -> None:
+    os.makedirs(history_dir, exist_ok=True)
+    json_path, npz_path = _history_paths(history["learner_id"], history_dir)
+    with open(json_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"learner_id": history["learner_id"], "entries": history["entries"]}, f, indent=4)
+    gap_embeddings = history["gap_embeddings"]
+    with open(npz_path + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            embeddings=history["embeddings"],
+            gap_embeddings=gap_embeddings if gap_embeddings is not None else np.zeros((0, 0)),
+            gap_sessions=history["gap_sessions"],
+            hashes=np.array([entry["hash"] for entry in history["entries"]]),
+        )
+    os.replace(npz_path + ".tmp", npz_path)
+    os.replace(json_path + ".tmp", json_path)
+
+
+def _session_stats(embeddings: np.ndarray, index: int) -> Tuple[float, Optional[float]]:
+    """Novelty and similarity to the previous session, measured against earlier sessions only."""
+    if index == 0:
+        return 1.0, None
+    previous, embedding = embeddings[:index], embeddings[index]
+    return float(1 - np.max(previous @ embedding)), float(previous[-1] @ embedding)
+
+
+def add_summary(history: Dict, summary: str, model, session_id: str) -> bool:
+    """
+    Record the summary of one conversation with its embeddings. Per-session statistics are
+    computed here, against earlier sessions only, so only the entries at or after a changed
+    session ever need recomputing. A conversation's summary grows as it goes on, so an
+    existing entry with the same session_id is replaced in place.
+    Returns False if the stored summary for this session is already up to date.
+    """
+    entries = history["entries"]
+    summary_hash = hashlib.sha256(summary.encode("utf-8")).hexdigest()
+    index = next((i for i, entry in enumerate(entries) if entry["session_id"] == session_id), None)
+    if index is not None and entries[index]["hash"] == summary_hash:
+        return False
+
+    gaps = find_gap_sentences(summary)
+    vectors = _normalize(np.asarray(model.encode([summary] + gaps, show_progress_bar=False), dtype=np.float32))
+    embedding, gap_vectors = vectors[0], vectors[1:]
+
+    entry = {
+        "session_id": session_id,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "hash": summary_hash,
+        "summary": summary,
+        "gaps": gaps,
+    }
+    sessions = history["gap_sessions"]
+    old_gaps = history["gap_embeddings"]
+    if index is None:
+        index = len(entries)
+        entries.append(entry)
+        history["embeddings"] = embedding[None] if index == 0 else np.vstack([history["embeddings"], embedding])
+    else:
+        # Keep the session's original position so the timeline stays chronological.
+        entry["timestamp"] = entries[index]["timestamp"]
+        entries[index] = entry
+        history["embeddings"][index] = embedding
+        if old_gaps is not None:
+            keep = sessions != index
+            old_gaps, sessions = old_gaps[keep], sessions[keep]
+
+    # Gap rows are kept in session order, matching the order of the gap texts in entries.
+    position = int(np.searchsorted(sessions, index))
+    if old_gaps is None or not len(old_gaps):
+        old_gaps = np.zeros((0, vectors.shape[1]), dtype=vectors.dtype)
+    gap_embeddings = np.concatenate([old_gaps[:position], gap_vectors, old_gaps[position:]])
+    history["gap_embeddings"] = gap_embeddings if len(gap_embeddings) else None
+    history["gap_sessions"] = np.concatenate(
+        [sessions[:position], np.full(len(gaps), index), sessions[position:]]).astype(int)
+
+    for i in range(index, len(entries)):
+        entries[i]["novelty"], entries[i]["similarity_to_last"] = _session_stats(history["embeddings"], i)
+    return True
+
+
+def cluster_themes(embeddings: np.ndarray, k: int) -> np.ndarray:
+    """Deterministic spherical k-means; returns a cluster label per session."""
+    k = min(k, len(embeddings))
+    # Farthest-point initialisation keeps results stable between runs.
+    centroids = [embeddings[0]]
+    for _ in range(1, k):
+        closest = np.max(embeddings @ np.array(centroids).T, axis=1)
+        centroids.append(embeddings[np.argmin(closest)])
+    centroids = np.array(centroids)
+
+    labels = np.zeros(len(embeddings), dtype=int)
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(embeddings @ centroids.T, axis=1)
+        for c in range(k):
+            members = embeddings[labels == c]
+            if len(members):
+                centroids[c] = _normalize(members.mean(axis=0))
+    return labels
+
+
+def recurring_gaps(history: Dict) -> List[Dict]:
+    """Group similar gap sentences and keep the groups that appear in more than one session."""
+    gap_vectors = history["gap_embeddings"]
+    if gap_vectors is None:
+        return []
+    sessions = history["gap_sessions"]
+    texts = [gap for entry in history["entries"] for gap in entry["gaps"]]
+
+    similar = (gap_vectors @ gap_vectors.T) >= GAP_SIMILARITY
+    assigned = np.zeros(len(gap_vectors), dtype=bool)
+    groups = []
+    # Seed groups from the most recent gaps so the representative wording is current.
+    for i in range(len(gap_vectors) - 1, -1, -1):
+        if assigned[i]:
+            continue
+        members = similar[i] & ~assigned
+        assigned |= members
+        group_sessions = np.unique(sessions[members])
+        if len(group_sessions) > 1:
+            groups.append({"text": texts[i], "sessions": [int(s) + 1 for s in group_sessions]})
+    groups.sort(key=lambda g: len(g["sessions"]), reverse=True)
+    return groups[:MAX_GAPS]
+
+
+def build_digest(history: Dict) -> str:
+    """Summarise a learner's history into a short, bounded-size text for the analysis prompt."""
+    entries = history["entries"]
+    if not entries:
+        return "No previous sessions recorded."
+    if len(entries) == 1:
+        return "This is the learner's first recorded session."
+
+    embeddings = history["embeddings"]
+    lines = [f"Sessions recorded: {len(entries)} ({entries[0]['timestamp']} to {entries[-1]['timestamp']})"]
+
+    lines.append("Recurring themes:")
+    labels = cluster_themes(embeddings, MAX_THEMES)
+    for c in sorted(set(labels), key=lambda c: -np.sum(labels == c)):
+        members = np.flatnonzero(labels == c)
+        centroid = _normalize(embeddings[members].mean(axis=0))
+        representative = members[np.argmax(embeddings[members] @ centroid)]
+        lines.append(f"- {len(members)} session(s), latest #{members[-1] + 1}: {_excerpt(entries[representative]['summary'])}")
+
+    novelty = np.array([entry["novelty"] for entry in entries[1:]])
+    half = max(1, len(novelty) // 2)
+    earlier, recent = novelty[:half].mean(), novelty[-half:].mean()
+    if abs(recent - earlier) < TREND_TOLERANCE:
+        direction = "steady"
+    else:
+        direction = "exploring new topics more" if recent > earlier else "revisiting familiar topics more"
+    lines.append("Progress trend:")
+    lines.append(f"- Topic novelty: earlier sessions {earlier:.2f}, recent sessions {recent:.2f} ({direction})")
+    lines.append(f"- Similarity of latest session to the one before: {entries[-1]['similarity_to_last']:.2f}")
+
+    gaps = recurring_gaps(history)
+    lines.append("Recurring gaps:")
+    if gaps:
+        for gap in gaps:
+            lines.append(f"- Sessions {', '.join(f'#{s}' for s in gap['sessions'])}: {_excerpt(gap['text'])}")
+    else:
+        lines.append("- None found across sessions")
+
+    return "\n".join(lines)
@@ -0,0 +1,16 @@
+from langchain_google_genai import ChatGoogleGenerativeAI
+import config
+
+llm = ChatGoogleGenerativeAI(
+    model="models/gemini-2.0-flash",
+    google_api_key=config.GOOGLE_API_KEY,
+    temperature=0.7,
+    disable_streaming=False
+)
+
+reasoning_llm = ChatGoogleGenerativeAI(
+    model="models/gemini-2.5-flash",
+    google_api_key=config.GOOGLE_API_KEY,
+    temperature=0.7,
+    disable_streaming=False
+)
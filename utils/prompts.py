@@ -72,4 +72,14 @@ generate_algorithm = """
 1. Provide a simple step-by-step algorithm for this code block structure.
 2. What could be the use of this code? Explain its purpose and functionality. (Under 50 words)
 3. Don't write in markdown.
-"""
\ No newline at end of file
+"""
+
+generate_summary = """
+Summarize this reflective conversation from the learner's point of view, addressing them as "you".
+Cover what they made, the approach they took, the challenges they faced, what they learned and what they plan to do next.
+Keep it under 120 words and don't write in markdown.
+"""
+
+
+def algorithm_prompt(flowchart, block_info):
+    return f"instructions:\n{generate_algorithm}\n\ncode:\n{flowchart}\n\nBlock Info:\n{block_info}"